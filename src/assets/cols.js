@@ -0,0 +1,21 @@
+// Column-selector interactions are pure view state: select-all /
+// clear-all just rewrite checkbox values, so they run clientside
+// instead of round-tripping to Python and re-rendering the whole
+// checkbox tree.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    cols: {
+        setAll: function (selectClicks, clearClicks, options) {
+            var ctx = window.dash_clientside.callback_context;
+            if (!ctx.triggered || !ctx.triggered.length) {
+                return window.dash_clientside.no_update;
+            }
+            var on = ctx.triggered[0].prop_id.indexOf("select-all") === 0;
+            if (!on) {
+                return [];
+            }
+            return (options || []).map(function (o) {
+                return o.value === undefined ? o : o.value;
+            });
+        },
+    },
+});
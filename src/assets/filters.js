@@ -0,0 +1,27 @@
+// Aggregates every filter row into one combined-filters store with a
+// 250 ms debounce, so N filter rows produce one server-visible update
+// per editing burst instead of one callback storm per keystroke.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    filters: {
+        aggregate: function (fields, operators, values) {
+            return new Promise(function (resolve) {
+                if (window._filterDebounceId) {
+                    clearTimeout(window._filterDebounceId);
+                }
+                window._filterDebounceId = setTimeout(function () {
+                    var filters = [];
+                    for (var i = 0; i < fields.length; i++) {
+                        if (fields[i] && operators[i]) {
+                            filters.push({
+                                field: fields[i],
+                                operator: operators[i],
+                                value: values[i] === undefined ? null : values[i],
+                            });
+                        }
+                    }
+                    resolve(filters);
+                }, 250);
+            });
+        },
+    },
+});
@@ -0,0 +1,25 @@
+// Clientside callbacks for UI-only interactions: these are pure view
+// transforms, so they run in the browser instead of round-tripping
+// through a Python callback.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    ui: {
+        updateDebugCell: function (activeCell) {
+            if (!activeCell) {
+                return "";
+            }
+            return (
+                "Active cell: row " + activeCell.row +
+                ", col " + activeCell.column_id
+            );
+        },
+        toggleExportDisabled: function (path) {
+            return !(path && path.trim().length > 0);
+        },
+        parseFigure: function (figJson) {
+            if (!figJson) {
+                return {data: [], layout: {}};
+            }
+            return JSON.parse(figJson);
+        },
+    },
+});
@@ -0,0 +1,1842 @@
+import copy
+import hashlib
+import io
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from functools import lru_cache
+from datetime import datetime
+from pathlib import Path
+
+import dash
+import dash_bootstrap_components as dbc
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+from dash import ALL, ClientsideFunction, dash_table, dcc, html
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
+
+from flask import Response, abort, request, send_file
+
+import server_side_cache
+from database import expand_path, get_database, invalidate_database
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    HAVE_PYARROW = True
+except ImportError:
+    pa = pc = None
+    HAVE_PYARROW = False
+
+try:
+    import dash_ag_grid as dag
+    HAVE_AG_GRID = True
+except ImportError:
+    dag = None
+    HAVE_AG_GRID = False
+
+try:
+    import dash_mantine_components as dmc
+    HAVE_DMC = True
+except ImportError:
+    dmc = None
+    HAVE_DMC = False
+
+# dmc.Select virtualizes its option list (renders ~limit visible rows),
+# which matters on wide schemas; dcc.Dropdown mounts every option. The
+# two spell their option prop differently, so callbacks target it via
+# this constant.
+VIZ_OPTIONS_PROP = "data" if HAVE_DMC else "options"
+
+
+def make_column_selector(component_id):
+    """Searchable column dropdown, virtualized when dmc is installed."""
+    if HAVE_DMC:
+        return dmc.Select(
+            id=component_id,
+            placeholder="Column",
+            searchable=True,
+            limit=50,
+            nothingFound="No columns",
+            data=[],
+            persistence=True,
+            persistence_type="memory",
+        )
+    return dcc.Dropdown(
+        id=component_id,
+        placeholder="Column",
+        persistence=True,
+        persistence_type="memory",
+    )
+
+# Operators offered in the filter rows. needs_value controls whether the
+# value dropdown is meaningful for the operator.
+FILTER_OPERATORS = {
+    "equals": {"label": "equals", "needs_value": True},
+    "not_equals": {"label": "does not equal", "needs_value": True},
+    "like": {"label": "contains", "needs_value": True},
+    "not_like": {"label": "does not contain", "needs_value": True},
+    "less_than": {"label": "less than", "needs_value": True},
+    "less_than_or_equal": {"label": "less than or equal", "needs_value": True},
+    "greater_than": {"label": "greater than", "needs_value": True},
+    "greater_than_or_equal": {"label": "greater than or equal", "needs_value": True},
+    "in": {"label": "in (comma-separated)", "needs_value": True},
+    "is_null": {"label": "is empty", "needs_value": False},
+    "is_not_null": {"label": "is not empty", "needs_value": False},
+}
+
+# Built once at import time; create_filter_row reuses these instead of
+# rebuilding identical option lists on every "Add filter" click.
+_OPERATOR_OPTIONS = tuple(
+    {"label": v["label"], "value": k} for k, v in FILTER_OPERATORS.items()
+)
+_NUMERIC_OPS = frozenset(
+    {"less_than", "less_than_or_equal", "greater_than", "greater_than_or_equal"}
+)
+
+VIZ_TYPES = [
+    {"label": "Histogram", "value": "histogram"},
+    {"label": "Bar (value counts)", "value": "bar"},
+    {"label": "Box", "value": "box"},
+]
+
+# Statistics/Visualizations tab content mounts lazily, so their
+# component ids are not present in the initial layout.
+app = dash.Dash(
+    __name__,
+    external_stylesheets=[dbc.themes.BOOTSTRAP],
+    suppress_callback_exceptions=True,
+)
+app.title = "Dataset Browser"
+
+try:
+    import orjson
+    from flask.json.provider import DefaultJSONProvider
+
+    class OrjsonProvider(DefaultJSONProvider):
+        """Rust-backed JSON encoding for every Flask/Dash response."""
+
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(
+                obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC
+            ).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    app.server.json = OrjsonProvider(app.server)
+    # Plotly's encoder has a native orjson engine as well.
+    pio.json.config.default_engine = "orjson"
+except ImportError:
+    pass
+
+
+@lru_cache(maxsize=64)
+def _filter_row_template(index):
+    """Hash-consed filter-row component tree for a given index.
+
+    The tree is a pure function of the index, so each index is built
+    once; create_filter_row hands out deep copies because Dash mutates
+    components during rendering.
+    """
+    return dbc.Row(
+        [
+            dbc.Col(
+                dcc.Dropdown(
+                    id={"type": "filter-field", "index": index},
+                    placeholder="Field",
+                ),
+                width=3,
+            ),
+            dbc.Col(
+                dcc.Dropdown(
+                    id={"type": "filter-operator", "index": index},
+                    options=list(_OPERATOR_OPTIONS),
+                    value="equals",
+                ),
+                width=3,
+            ),
+            dbc.Col(
+                dcc.Dropdown(
+                    id={"type": "filter-value", "index": index},
+                    placeholder="Value",
+                    searchable=True,
+                ),
+                width=4,
+            ),
+            dbc.Col(
+                dbc.Button(
+                    "Remove",
+                    id={"type": "remove-filter-btn", "index": index},
+                    color="danger",
+                    outline=True,
+                    size="sm",
+                ),
+                width=2,
+            ),
+        ],
+        className="mb-2",
+        id={"type": "filter-row", "index": index},
+    )
+
+
+def create_filter_row(index):
+    """Build one filter row (field, operator, value, remove button)."""
+    return copy.deepcopy(_filter_row_template(index))
+
+
+def get_selected_columns_for_display(df, selected_columns):
+    """Restrict a DataFrame to the selected columns, keeping table order."""
+    if not selected_columns:
+        return df
+    keep = [c for c in df.columns if c in selected_columns]
+    return df[keep] if keep else df
+
+
+def truncate_cells(str_df, width=40):
+    """Truncate every cell to `width` chars with a vectorized kernel.
+
+    With pyarrow this is one utf8_slice_codeunits/utf8_length pass per
+    column in C++; the fallback uses pandas' vectorized .str ops. Both
+    replace the old per-cell applymap lambda, which dispatched a Python
+    call for every cell in the frame.
+    """
+    if HAVE_PYARROW:
+        arrays = {}
+        for c in str_df.columns:
+            arr = pa.array(str_df[c], type=pa.string())
+            needs = pc.greater(pc.utf8_length(arr), width)
+            sliced = pc.binary_join_element_wise(
+                pc.utf8_slice_codeunits(arr, 0, width), "…", ""
+            )
+            arrays[c] = pc.if_else(needs, sliced, arr)
+        return pa.table(arrays).to_pandas()
+    out = {}
+    for c in str_df.columns:
+        s = str_df[c]
+        out[c] = s.where(s.str.len() <= width, s.str.slice(0, width) + "…")
+    return pd.DataFrame(out, index=str_df.index)
+
+
+def create_table_with_truncation(df):
+    """Render a DataFrame as a DataTable.
+
+    Table cells are limited to 40 characters for readability. The
+    display strings are produced with vectorized pandas casts — a
+    single astype(str) over the frame plus one C-level to_dict — rather
+    than a per-row iterrows loop that boxes every cell.
+    """
+    str_df = df.astype(object).where(df.notna(), "").astype(str)
+    str_df = truncate_cells(str_df)
+    # One bulk ndarray dump plus zipped column names builds the records
+    # measurably faster than pandas' generic to_dict dispatch, and the
+    # shared key strings let the JSON serializer reuse interned keys.
+    cols = [str(c) for c in str_df.columns]
+    display_data = [dict(zip(cols, row)) for row in str_df.to_numpy().tolist()]
+    return dash_table.DataTable(
+        id="data-table",
+        data=display_data,
+        columns=[{"name": c, "id": c} for c in cols],
+        # Native pagination + virtualization keep the DOM at O(visible
+        # rows); the fixed table height gives the virtualizer a viewport
+        # to compute against.
+        page_action="native",
+        page_size=50,
+        virtualization=True,
+        fixed_rows={"headers": True},
+        style_table={"height": "600px", "overflowY": "auto"},
+        style_cell={"textAlign": "left"},
+        style_header={"fontWeight": "bold"},
+    )
+
+
+# Cap for payloads that still ship rows to the browser.
+def finalize_query_result(display_df, sql_display, payload):
+    """Shared tail of apply_filters and execute_custom_query.
+
+    The two callbacks used to duplicate the grid render, info line and
+    schema assembly; this fuses them in one place.
+    """
+    table = create_results_grid(display_df)
+    info = html.Div(f"{len(display_df)} rows returned")
+    schema = build_schema(display_df)
+    return table, info, sql_display, payload, schema
+
+
+def create_results_grid(df):
+    """Render query results with a DOM-virtualized grid.
+
+    dash-ag-grid mounts only the visible viewport (plus rowBuffer) so
+    DOM size stays O(viewport x cols) regardless of result size, which
+    also makes the 40-char cell truncation unnecessary on this path.
+    Falls back to the virtualized DataTable when dash-ag-grid is not
+    installed.
+    """
+    if not HAVE_AG_GRID:
+        return create_table_with_truncation(df)
+    cols = [str(c) for c in df.columns]
+    return dag.AgGrid(
+        id="data-grid",
+        rowData=[dict(zip(cols, row)) for row in df.to_numpy().tolist()],
+        columnDefs=[{"field": c} for c in cols],
+        defaultColDef={"sortable": True, "filter": True, "resizable": True},
+        dashGridOptions={
+            "rowBuffer": 20,
+            "pagination": True,
+            "paginationPageSize": 100,
+        },
+        style={"height": "600px"},
+    )
+
+
+# Serialized figure JSON keyed by (column, viz_type, data fingerprint).
+# Repeat renders of the same view skip both figure construction and
+# plotly's JSON encoding; the browser just JSON.parses the cached
+# string (assets/ui.js).
+_FIG_JSON_CACHE = OrderedDict()
+_FIG_JSON_CACHE_MAX = 64
+
+
+def _viz_spec(series, viz_type):
+    """Aggregate one column for a viz type into a small plain spec.
+
+    The spec is everything the figure needs — bins, counts, or
+    quantiles — so building the figure itself is O(spec), and a cached
+    spec never touches the rows again.
+    """
+    if viz_type == "bar":
+        counts = series.value_counts().head(20)
+        return {"x": counts.index.astype(str).tolist(), "y": counts.values.tolist()}
+    values = pd.to_numeric(series, errors="coerce").dropna()
+    if viz_type == "box":
+        if values.empty:
+            return None
+        q1, median, q3 = values.quantile([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        return {
+            "q1": float(q1),
+            "median": float(median),
+            "q3": float(q3),
+            "lower": float(max(values.min(), q1 - 1.5 * iqr)),
+            "upper": float(min(values.max(), q3 + 1.5 * iqr)),
+        }
+    if values.empty:
+        # Non-numeric column: histogram degrades to value counts.
+        counts = series.astype(str).value_counts().head(30)
+        return {"x": counts.index.tolist(), "y": counts.values.tolist()}
+    counts, edges = np.histogram(values, bins=30)
+    return {
+        "x": ((edges[:-1] + edges[1:]) / 2).tolist(),
+        "y": counts.tolist(),
+        "width": float(edges[1] - edges[0]) * 0.95,
+    }
+
+
+_EMPTY_FIGURE = {"data": [], "layout": {}}
+
+
+def _figure_from_spec(spec, column, viz_type):
+    """Assemble a plain-dict figure from a precomputed spec.
+
+    Raw trace/layout dicts skip graph_objects' per-property validation
+    and the deep copy inside go.Figure; Dash serializes them as-is.
+    """
+    if spec is None:
+        return _EMPTY_FIGURE
+    layout = {"margin": {"t": 30}}
+    if viz_type == "box":
+        data = [
+            {
+                "type": "box",
+                "name": column,
+                "q1": [spec["q1"]],
+                "median": [spec["median"]],
+                "q3": [spec["q3"]],
+                "lowerfence": [spec["lower"]],
+                "upperfence": [spec["upper"]],
+            }
+        ]
+    else:
+        trace = {"type": "bar", "x": spec["x"], "y": spec["y"]}
+        if "width" in spec:
+            trace["width"] = spec["width"]
+            layout["bargap"] = 0
+        data = [trace]
+        layout["xaxis"] = {"title": {"text": column}}
+        layout["yaxis"] = {"title": {"text": "count"}}
+    return {"data": data, "layout": layout}
+
+
+_VIZ_BUILDER_CACHE = server_side_cache.LRUCache(maxsize=128)
+
+
+def make_viz_builder(column, viz_type, dataset_fp):
+    """Specialized figure builder for one (column, viz type, dataset).
+
+    The aggregation over the rows happens once, at builder creation;
+    repeat invocations just reassemble the figure from the captured
+    spec. A failed frame resolve is deliberately not cached, so a
+    transient miss doesn't pin an empty figure for the key.
+    """
+    key = (column, viz_type, dataset_fp)
+    builder = _VIZ_BUILDER_CACHE.get(key)
+    if builder is not None:
+        return builder
+    df = resolve_frame({"fp": dataset_fp})
+    if df is None or column not in df.columns:
+        return lambda: _EMPTY_FIGURE
+    spec = _viz_spec(df[column], viz_type)
+
+    def builder():
+        return _figure_from_spec(spec, column, viz_type)
+
+    _VIZ_BUILDER_CACHE.put(key, builder)
+    return builder
+
+
+def _data_fingerprint(data):
+    return hashlib.blake2b(repr(data).encode(), digest_size=8).hexdigest()
+
+
+def _cached_figure_json(key, build):
+    cached = _FIG_JSON_CACHE.get(key)
+    if cached is not None:
+        try:
+            _FIG_JSON_CACHE.move_to_end(key)
+        except KeyError:
+            # Concurrent eviction; the cached string is still valid.
+            pass
+        return cached
+    fig_json = pio.to_json(build())
+    _FIG_JSON_CACHE[key] = fig_json
+    if len(_FIG_JSON_CACHE) > _FIG_JSON_CACHE_MAX:
+        _FIG_JSON_CACHE.popitem(last=False)
+    return fig_json
+
+
+SESSIONS_DIR = Path("data") / "sessions"
+
+
+def downcast_frame(df):
+    """Shrink numeric widths and category-encode repetitive strings.
+
+    float64/int64 columns downcast to the narrowest dtype that holds
+    them, and object columns whose distinct ratio is under 0.5 become
+    categoricals, so the server-side result cache, the Parquet session
+    spill, and every payload derived from the frame carry interned
+    values instead of duplicated ones.
+    """
+    out = df.copy()
+    for c in out.select_dtypes(include=["float64"]).columns:
+        out[c] = pd.to_numeric(out[c], downcast="float")
+    for c in out.select_dtypes(include=["int64"]).columns:
+        out[c] = pd.to_numeric(out[c], downcast="integer")
+    for c in out.select_dtypes(include=["object"]).columns:
+        if out[c].nunique(dropna=True) / max(len(out), 1) < 0.5:
+            out[c] = out[c].astype("category")
+    return out
+
+
+def store_payload(df, node_spec, source="table"):
+    """Build the current-data-store payload for a query result.
+
+    The frame itself stays server-side — in the fingerprint cache,
+    backed by a Parquet session file when pyarrow is available — and
+    only the opaque handle (plus column names for option building)
+    crosses the wire. Without pyarrow the records ride along as a
+    fallback so an evicted cache entry can still be rebuilt. `source`
+    records whether the rows came from a table browse or a custom
+    query, so consumers know whether table-backed SQL fast paths apply.
+    """
+    fp = server_side_cache.fingerprint(node_spec)
+    try:
+        df = downcast_frame(df)
+    except (TypeError, ValueError):
+        # Duplicate column names (SELECT 1 AS a, 2 AS a) make column
+        # access return frames; serve the result un-downcast rather
+        # than failing the whole callback.
+        pass
+    server_side_cache.results.put(fp, df)
+    payload = {
+        "fp": fp,
+        "source": source,
+        "columns": [str(c) for c in df.columns],
+    }
+    if HAVE_PYARROW:
+        try:
+            SESSIONS_DIR.mkdir(parents=True, exist_ok=True)
+            df.to_parquet(SESSIONS_DIR / f"{fp}.parquet")
+        except (OSError, ValueError, TypeError, pa.ArrowInvalid):
+            # Mixed-type object columns are routine in SQLite results
+            # and Arrow refuses them; fall back to shipping records so
+            # an evicted cache entry can still be rebuilt.
+            payload["records"] = df.to_dict("records")
+    else:
+        payload["records"] = df.to_dict("records")
+    return payload
+
+
+def resolve_frame(data):
+    """DataFrame for a store payload: cache, session file, or records."""
+    fp = store_fp(data)
+    if fp:
+        df = server_side_cache.results.get(fp)
+        if df is not None:
+            return df
+        if HAVE_PYARROW:
+            session_file = SESSIONS_DIR / f"{fp}.parquet"
+            if session_file.exists():
+                df = pd.read_parquet(session_file)
+                server_side_cache.results.put(fp, df)
+                return df
+    records = store_records(data)
+    if records:
+        return pd.DataFrame(records)
+    return None
+
+
+def build_schema(df):
+    """Per-column dtype metadata, computed once per query result.
+
+    Downstream callbacks read this dict from the schema store instead
+    of re-running pandas dtype introspection over the frame on every
+    invocation.
+    """
+    schema = {}
+    for col in df.columns:
+        series = df[col]
+        schema[str(col)] = {
+            "dtype": str(series.dtype),
+            "is_numeric": bool(pd.api.types.is_numeric_dtype(series)),
+        }
+    return schema
+
+
+def store_records(data):
+    """Records list from a store payload (tolerates the bare form)."""
+    if isinstance(data, dict):
+        return data.get("records")
+    return data
+
+
+def store_fp(data):
+    """Fingerprint from a store payload, or None."""
+    if isinstance(data, dict):
+        return data.get("fp")
+    return None
+
+
+def store_source(data):
+    """Result source ('table' or 'query') from a store payload."""
+    if isinstance(data, dict):
+        return data.get("source")
+    return None
+
+
+app.layout = dbc.Container(
+    [
+        html.H2("Dataset Browser", className="my-3"),
+        # Database selection
+        dbc.Card(
+            dbc.CardBody(
+                [
+                    dbc.Row(
+                        [
+                            dbc.Col(
+                                dbc.Input(
+                                    id="db-path-input",
+                                    placeholder="Path to SQLite database",
+                                    type="text",
+                                    debounce=True,
+                                ),
+                                width=6,
+                            ),
+                            dbc.Col(
+                                dbc.Button(
+                                    "Load database", id="load-db-btn", color="primary"
+                                ),
+                                width="auto",
+                            ),
+                            dbc.Col(html.Div(id="db-status"), width=True),
+                        ],
+                        align="center",
+                    ),
+                    dbc.Row(
+                        [
+                            dbc.Col(
+                                dcc.Dropdown(
+                                    id="table-selector", placeholder="Table"
+                                ),
+                                width=6,
+                            ),
+                            dbc.Col(
+                                dbc.Button(
+                                    "Load table",
+                                    id="load-table-btn",
+                                    color="secondary",
+                                ),
+                                width="auto",
+                            ),
+                        ],
+                        align="center",
+                        className="mt-2",
+                    ),
+                    html.Div(id="table-info", className="mt-2"),
+                ]
+            ),
+            className="mb-3",
+        ),
+        # Filters
+        dbc.Card(
+            dbc.CardBody(
+                [
+                    html.H5("Filters"),
+                    html.Div(id="filters-container", children=[create_filter_row(0)]),
+                    dbc.Row(
+                        [
+                            dbc.Col(
+                                dbc.Button(
+                                    "Add filter",
+                                    id="add-filter-btn",
+                                    color="secondary",
+                                    outline=True,
+                                ),
+                                width="auto",
+                            ),
+                            dbc.Col(
+                                dbc.Button(
+                                    "Apply filters",
+                                    id="apply-filters-btn",
+                                    color="primary",
+                                ),
+                                width="auto",
+                            ),
+                        ]
+                    ),
+                ]
+            ),
+            className="mb-3",
+        ),
+        # Custom SQL
+        dbc.Card(
+            dbc.CardBody(
+                [
+                    html.H5("Custom query"),
+                    dbc.Textarea(
+                        id="custom-query-input",
+                        placeholder="SELECT ...",
+                        style={"height": "90px"},
+                    ),
+                    dbc.Button(
+                        "Run query",
+                        id="run-query-btn",
+                        color="primary",
+                        className="mt-2",
+                    ),
+                ]
+            ),
+            className="mb-3",
+        ),
+        # Column selection
+        dbc.Card(
+            dbc.CardBody(
+                [
+                    html.H5("Columns"),
+                    dbc.Row(
+                        [
+                            dbc.Col(
+                                dbc.Button(
+                                    "Select all",
+                                    id="select-all-cols-btn",
+                                    size="sm",
+                                    color="secondary",
+                                    outline=True,
+                                ),
+                                width="auto",
+                            ),
+                            dbc.Col(
+                                dbc.Button(
+                                    "Clear all",
+                                    id="clear-all-cols-btn",
+                                    size="sm",
+                                    color="secondary",
+                                    outline=True,
+                                ),
+                                width="auto",
+                            ),
+                        ],
+                        className="mb-2",
+                    ),
+                    html.Div(id="column-selector"),
+                ]
+            ),
+            className="mb-3",
+        ),
+        # SQL display
+        dbc.Card(
+            dbc.CardBody(
+                [html.H5("SQL"), html.Pre(id="sql-display")]
+            ),
+            className="mb-3",
+        ),
+        # Results tabs
+        dbc.Tabs(
+            [
+                dbc.Tab(
+                    [
+                        html.Div(id="query-info"),
+                        html.Div(id="table-results"),
+                        dbc.Row(
+                            [
+                                dbc.Col(
+                                    dbc.Button(
+                                        "Previous page",
+                                        id="prev-page-btn",
+                                        size="sm",
+                                        color="secondary",
+                                        outline=True,
+                                    ),
+                                    width="auto",
+                                ),
+                                dbc.Col(
+                                    dbc.Button(
+                                        "Next page",
+                                        id="next-page-btn",
+                                        size="sm",
+                                        color="secondary",
+                                        outline=True,
+                                    ),
+                                    width="auto",
+                                ),
+                                dbc.Col(
+                                    html.Span(id="page-indicator"),
+                                    width="auto",
+                                ),
+                            ],
+                            className="my-2",
+                            align="center",
+                        ),
+                    ],
+                    label="Table",
+                    tab_id="tab-table",
+                ),
+                dbc.Tab(
+                    html.Div(id="stats-tab-content"),
+                    label="Statistics",
+                    tab_id="tab-stats",
+                ),
+                dbc.Tab(
+                    html.Div(id="viz-tab-content"),
+                    label="Visualizations",
+                    tab_id="tab-viz",
+                ),
+            ],
+            id="main-tabs",
+            active_tab="tab-table",
+            className="mb-3",
+        ),
+        html.Div(id="debug-active-cell", className="text-muted small"),
+        # Export
+        dbc.Card(
+            dbc.CardBody(
+                [
+                    html.H5("Export"),
+                    dbc.Row(
+                        [
+                            dbc.Col(
+                                dbc.Input(
+                                    id="export-path-input",
+                                    placeholder="Export directory",
+                                    type="text",
+                                    debounce=True,
+                                ),
+                                width=6,
+                            ),
+                            dbc.Col(
+                                dbc.Checkbox(
+                                    id="export-selected-columns-only",
+                                    label="Selected columns only",
+                                    value=False,
+                                ),
+                                width="auto",
+                            ),
+                            dbc.Col(
+                                dbc.Checkbox(
+                                    id="export-compress",
+                                    label="gzip (.tsv.gz)",
+                                    value=False,
+                                ),
+                                width="auto",
+                            ),
+                            dbc.Col(
+                                dbc.Checkbox(
+                                    id="export-durable",
+                                    label="Durable (fsync)",
+                                    value=False,
+                                ),
+                                width="auto",
+                            ),
+                            dbc.Col(
+                                dcc.Dropdown(
+                                    id="export-format",
+                                    options=[
+                                        {"label": "TSV", "value": "tsv"},
+                                        {"label": "Parquet", "value": "parquet"},
+                                    ],
+                                    value="tsv",
+                                    clearable=False,
+                                    style={"width": "120px"},
+                                ),
+                                width="auto",
+                            ),
+                            dbc.Col(
+                                dbc.Button(
+                                    "Export table",
+                                    id="export-table-btn",
+                                    color="primary",
+                                ),
+                                width="auto",
+                            ),
+                        ],
+                        align="center",
+                    ),
+                    html.Div(id="export-status", className="mt-2"),
+                    dcc.Interval(
+                        id="export-poll-interval", interval=1000, disabled=True
+                    ),
+                ]
+            ),
+            className="mb-3",
+        ),
+        # Hidden stores
+        dcc.Store(id="current-data-store", storage_type="memory"),
+        dcc.Store(id="current-table-store", storage_type="memory"),
+        dcc.Store(id="current-filters-store", storage_type="memory"),
+        dcc.Store(id="filter-count-store", storage_type="memory", data={"count": 1}),
+        dcc.Store(id="table-columns-store", storage_type="memory"),
+        dcc.Store(id="viz-figure-json", storage_type="memory"),
+        dcc.Store(id="combined-filters-store", storage_type="memory"),
+        dcc.Store(id="last-export-store", storage_type="session"),
+        dcc.Store(id="schema-store", storage_type="memory"),
+        dcc.Store(id="page-state", storage_type="memory", data={"page": 0}),
+    ],
+    fluid=True,
+)
+
+
+def _cache_layout_view(view):
+    """Serve /_dash-layout from a pre-serialized body.
+
+    The layout tree is static for the life of the process, but Dash
+    re-runs component JSON serialization on every request for it. Encode
+    once on first hit, then return the cached bytes with an immutable
+    cache header.
+    """
+    state = {}
+
+    def serve_cached_layout(*args, **kwargs):
+        body = state.get("body")
+        if body is None:
+            body = view(*args, **kwargs).get_data()
+            state["body"] = body
+        return Response(
+            body,
+            mimetype="application/json",
+            headers={"Cache-Control": "public, max-age=3600"},
+        )
+
+    return serve_cached_layout
+
+
+for _endpoint, _view in list(app.server.view_functions.items()):
+    if "_dash-layout" in _endpoint:
+        app.server.view_functions[_endpoint] = _cache_layout_view(_view)
+
+
+def _build_stats_tab():
+    return html.Div(id="statistics-container")
+
+
+def _build_viz_tab():
+    return [
+        dbc.Row(
+            [
+                dbc.Col(make_column_selector("viz-column-selector"), width=4),
+                dbc.Col(
+                    dcc.Dropdown(
+                        id="viz-type-selector",
+                        options=VIZ_TYPES,
+                        value="histogram",
+                        persistence=True,
+                        persistence_type="memory",
+                    ),
+                    width=4,
+                ),
+            ],
+            className="my-2",
+        ),
+        dcc.Graph(id="data-visualization"),
+    ]
+
+
+_TAB_CONTENT = {}
+
+
+@app.callback(
+    Output("stats-tab-content", "children"),
+    Output("viz-tab-content", "children"),
+    Input("main-tabs", "active_tab"),
+)
+def render_tab_content(active_tab):
+    """Mount heavy tab content only when its tab is focused.
+
+    The initial load fires only the Table callback chain; the component
+    trees are built once per process and reused. Dash re-fires the tab's
+    data callbacks when the components mount, so content catches up with
+    the current stores.
+    """
+    stats = viz = dash.no_update
+    if active_tab == "tab-stats":
+        stats = _TAB_CONTENT.setdefault("stats", _build_stats_tab())
+    elif active_tab == "tab-viz":
+        viz = _TAB_CONTENT.setdefault("viz", _build_viz_tab())
+    return stats, viz
+
+
+@app.server.route("/session/<fp>.arrow")
+def session_arrow_ipc(fp):
+    """Serve a cached session frame as an Arrow IPC stream.
+
+    Binary columnar bytes for out-of-band consumers (Arrow.js decodes
+    them zero-copy into TypedArrays), instead of JSON records through
+    the Dash callback pipe.
+    """
+    if not HAVE_PYARROW:
+        abort(501, description="Arrow IPC responses require pyarrow")
+    df = resolve_frame({"fp": fp})
+    if df is None:
+        abort(404, description="Unknown or expired session handle")
+    tbl = pa.Table.from_pandas(df, preserve_index=False)
+    buf = pa.BufferOutputStream()
+    with pa.ipc.new_stream(buf, tbl.schema) as writer:
+        writer.write_table(tbl)
+    return send_file(
+        io.BytesIO(buf.getvalue().to_pybytes()),
+        mimetype="application/vnd.apache.arrow.stream",
+        download_name=f"{fp}.arrow",
+    )
+
+
+@app.server.route("/download/<table_name>")
+def download_table_parquet(table_name):
+    """Serve a table (optionally limited) as Parquet.
+
+    Large results move over this plain HTTP route as compressed
+    columnar bytes instead of riding through the Dash callback pipeline
+    as JSON; the in-app JSON path remains the default for small
+    results.
+    """
+    if not HAVE_PYARROW:
+        abort(501, description="Parquet downloads require pyarrow")
+    db_path = request.args.get("db")
+    if not db_path:
+        abort(400, description="Missing ?db= database path")
+    limit = request.args.get("limit", type=int)
+    db, error = get_database(db_path)
+    if error:
+        abort(400, description=error)
+    df, error, _ = db.get_table_data(
+        table_name, limit=limit, build_display=False
+    )
+    if error:
+        abort(400, description=error)
+    buf = io.BytesIO()
+    df.to_parquet(buf, compression="zstd")
+    buf.seek(0)
+    return send_file(
+        buf,
+        mimetype="application/octet-stream",
+        download_name=f"{table_name}.parquet",
+    )
+
+
+@app.callback(
+    Output("table-selector", "options"),
+    Output("db-status", "children"),
+    Input("load-db-btn", "n_clicks"),
+    State("db-path-input", "value"),
+    prevent_initial_call=True,
+)
+def load_database(n_clicks, db_path):
+    if not db_path:
+        return [], dbc.Alert("Enter a database path", color="warning")
+    # Explicit load: drop any stale cached instance, then warm a fresh
+    # shared one that later callbacks reuse.
+    invalidate_database(db_path)
+    db, error = get_database(db_path)
+    if error:
+        return [], dbc.Alert(f"Could not open database: {error}", color="danger")
+    options = [{"label": t, "value": t} for t in db.table_names]
+    return options, dbc.Alert(
+        f"Loaded {len(options)} tables", color="success", className="mb-0"
+    )
+
+
+@app.callback(
+    Output("table-info", "children"),
+    Output("table-columns-store", "data"),
+    Output("current-table-store", "data"),
+    Input("load-table-btn", "n_clicks"),
+    State("table-selector", "value"),
+    State("db-path-input", "value"),
+    prevent_initial_call=True,
+)
+def load_table_info(n_clicks, table_name, db_path):
+    """Load table metadata and record the active table in one pass.
+
+    Previously a second callback (store_table_name) re-fired on the
+    same click just to copy the selector value into the store — one
+    extra round-trip per table load for no work.
+    """
+    if not table_name or not db_path:
+        raise PreventUpdate
+    db, error = get_database(db_path)
+    if error:
+        alert = dbc.Alert(f"Could not open database: {error}", color="danger")
+        return alert, None, None
+    info, error = db.get_table_info(table_name)
+    if error:
+        return dbc.Alert(error, color="danger"), None, None
+    columns = [c["name"] for c in info["columns"]]
+    prefix = "≈ " if info.get("approximate") else ""
+    summary = (
+        f"{table_name}: {len(columns)} columns, {prefix}{info['row_count']:,} rows"
+    )
+    return html.Div(summary), columns, table_name
+
+
+@app.callback(
+    Output("filters-container", "children"),
+    Output("filter-count-store", "data"),
+    Input("add-filter-btn", "n_clicks"),
+    State("filters-container", "children"),
+    State("filter-count-store", "data"),
+    prevent_initial_call=True,
+)
+def add_filter(n_clicks, children, count_data):
+    count = (count_data or {}).get("count", 1)
+    children = children or []
+    children.append(create_filter_row(count))
+    return children, {"count": count + 1}
+
+
+@app.callback(
+    Output("filters-container", "children", allow_duplicate=True),
+    Input({"type": "remove-filter-btn", "index": ALL}, "n_clicks"),
+    State("filters-container", "children"),
+    prevent_initial_call=True,
+)
+def remove_filter(n_clicks_list, children):
+    if not any(n for n in n_clicks_list if n):
+        raise PreventUpdate
+    # dash.ctx.triggered_id hands back the pattern id as a dict —
+    # no prop_id string splitting, no json.loads.
+    triggered_id = dash.ctx.triggered_id
+    if not triggered_id:
+        raise PreventUpdate
+    removed_index = triggered_id["index"]
+    # Keep the surviving rows by reference: their typed values and
+    # dropdown options stay intact, and nothing re-mounts, so removing
+    # one row no longer cascades into re-populating every dropdown.
+    remaining = [
+        child
+        for child in children or []
+        if child.get("props", {}).get("id", {}).get("index") != removed_index
+    ]
+    if not remaining:
+        remaining = [create_filter_row(0)]
+    return remaining
+
+
+@app.callback(
+    Output({"type": "filter-field", "index": ALL}, "options"),
+    Input("table-columns-store", "data"),
+    State({"type": "filter-field", "index": ALL}, "options"),
+)
+def update_filter_field_options(columns, current_options):
+    """Send field options only to rows that don't hold them already.
+
+    Adding the Nth filter row re-fires this pattern callback for every
+    row; answering no_update for rows whose options already equal the
+    current column list lets Dash skip re-rendering the other N-1
+    dropdowns. Comparing against each row's own options keeps the guard
+    stateless, so it is correct per session — a reload or a second
+    browser starts from empty dropdowns and gets the full update.
+    """
+    if not columns:
+        raise PreventUpdate
+    options = [{"label": c, "value": c} for c in columns]
+    return [
+        dash.no_update if current == options else options
+        for current in current_options
+    ]
+
+
+@app.callback(
+    Output({"type": "filter-value", "index": ALL}, "options"),
+    Input({"type": "filter-field", "index": ALL}, "value"),
+    Input({"type": "filter-operator", "index": ALL}, "value"),
+    Input({"type": "filter-value", "index": ALL}, "search_value"),
+    State("current-table-store", "data"),
+    State("db-path-input", "value"),
+)
+def update_filter_value_options(fields, operators, search_values, table, db_path):
+    if not table or not db_path:
+        raise PreventUpdate
+    # The options list does not depend on the typed search text (Dash
+    # filters options client-side), so a keystroke storm in the value
+    # dropdown must not re-run the DISTINCT queries: only re-query when
+    # a field or operator actually changed.
+    triggered = dash.callback_context.triggered
+    if triggered and all(
+        '"filter-value"' in t["prop_id"] for t in triggered if t["prop_id"] != "."
+    ):
+        raise PreventUpdate
+    # One query per distinct field, not per filter row: rows sharing a
+    # field reuse the same options list, and get_distinct_values folds
+    # the old COUNT(DISTINCT) + DISTINCT pair into one LIMIT n+1 query
+    # served from its per-column cache on repeats.
+    wanted = {
+        field
+        for field, operator in zip(fields, operators)
+        if field and operator == "equals"
+    }
+    if not wanted:
+        # Nothing needs the database (like/range rows have no preset
+        # options) — don't even touch the connection registry.
+        return [[] for _ in fields]
+    db, error = get_database(db_path)
+    if error:
+        raise PreventUpdate
+    options_by_field = {}
+    for field in wanted:
+        # One over the cutoff so >1000-distinct columns are detected
+        # without a separate COUNT(DISTINCT); up to 1000 distinct the
+        # first 50 values become options (the value input is a
+        # dropdown, so preset options are the only way to pick).
+        unique_values, error = db.get_distinct_values(table, field, limit=1001)
+        if error or len(unique_values) > 1000:
+            options_by_field[field] = []
+            continue
+        # One str() per value, with the same string object reused for
+        # label and value (and interned by the serializer).
+        as_str = list(map(str, unique_values[:50]))
+        options_by_field[field] = [{"label": s, "value": s} for s in as_str]
+    return [
+        options_by_field.get(field, []) if operator == "equals" else []
+        for field, operator in zip(fields, operators)
+    ]
+
+
+def collect_filters(combined):
+    """Usable filter dicts from the combined-filters store."""
+    filters = []
+    for f in combined or []:
+        field = f.get("field")
+        operator = f.get("operator")
+        value = f.get("value")
+        if not field or not operator:
+            continue
+        needs_value = FILTER_OPERATORS.get(operator, {}).get("needs_value", True)
+        if needs_value and (value is None or value == ""):
+            continue
+        filters.append({"field": field, "operator": operator, "value": value})
+    return filters
+
+
+# All filter rows funnel into one debounced store (assets/filters.js);
+# server callbacks read that single store instead of pattern-matching
+# every row, which kept the callback count O(rows) per keystroke.
+app.clientside_callback(
+    ClientsideFunction(namespace="filters", function_name="aggregate"),
+    Output("combined-filters-store", "data"),
+    Input({"type": "filter-field", "index": ALL}, "value"),
+    Input({"type": "filter-operator", "index": ALL}, "value"),
+    Input({"type": "filter-value", "index": ALL}, "value"),
+)
+
+
+@app.callback(
+    Output("table-results", "children"),
+    Output("query-info", "children"),
+    Output("sql-display", "children"),
+    Output("current-data-store", "data"),
+    Output("current-filters-store", "data"),
+    Output("schema-store", "data"),
+    Output("page-state", "data"),
+    Output("page-indicator", "children"),
+    Input("apply-filters-btn", "n_clicks"),
+    State("db-path-input", "value"),
+    State("current-table-store", "data"),
+    State("combined-filters-store", "data"),
+    State("column-checklist", "value"),
+    prevent_initial_call=True,
+)
+def apply_filters(n_clicks, db_path, table_name, combined_filters, selected_columns):
+    if not db_path or not table_name:
+        raise PreventUpdate
+    filters = collect_filters(combined_filters)
+    db, error = get_database(db_path)
+    if error:
+        alert = dbc.Alert(f"Could not open database: {error}", color="danger")
+        return alert, None, None, None, None, None, None, ""
+    # Projection happens in SQL: only the checked columns leave SQLite,
+    # so bytes and DataFrame memory scale with the selection, not the
+    # table width. The store holds the same projected frame; widening
+    # the selection re-queries.
+    df, error, sql_query = db.get_table_data(
+        table_name, filters=filters, columns=selected_columns or None
+    )
+    if error:
+        return (
+            dbc.Alert(error, color="danger"),
+            None, None, None, None, None, None, "",
+        )
+    payload = store_payload(
+        df, {"db": db_path, "table": table_name, "filters": filters, "limit": 500}
+    )
+    table, info, sql_display, payload, schema = finalize_query_result(
+        df, sql_query, payload
+    )
+    return (
+        table,
+        info,
+        sql_display,
+        payload,
+        filters,
+        schema,
+        {"page": 0, "source": "table"},
+        "page 1",
+    )
+
+
+PAGE_SIZE = 500
+
+
+@app.callback(
+    Output("table-results", "children", allow_duplicate=True),
+    Output("query-info", "children", allow_duplicate=True),
+    Output("page-state", "data", allow_duplicate=True),
+    Output("page-indicator", "children", allow_duplicate=True),
+    Input("prev-page-btn", "n_clicks"),
+    Input("next-page-btn", "n_clicks"),
+    State("page-state", "data"),
+    State("db-path-input", "value"),
+    State("current-table-store", "data"),
+    State("combined-filters-store", "data"),
+    State("column-checklist", "value"),
+    prevent_initial_call=True,
+)
+def change_page(prev_clicks, next_clicks, page_state, db_path, table_name,
+                combined_filters, selected_columns):
+    """Fetch one LIMIT/OFFSET page instead of re-materializing a slab.
+
+    Only the requested window of rows is pulled, parsed, and shipped;
+    the pooled connection's statement cache sees the same query text
+    with different bound offsets.
+    """
+    if not db_path or not table_name:
+        raise PreventUpdate
+    if (page_state or {}).get("source") == "query":
+        # The grid currently shows a custom-query result; paging the
+        # underlying table would silently replace it.
+        raise PreventUpdate
+    page = (page_state or {}).get("page", 0)
+    if dash.ctx.triggered_id == "prev-page-btn":
+        page = max(page - 1, 0)
+    else:
+        page += 1
+    db, error = get_database(db_path)
+    if error:
+        raise PreventUpdate
+    filters = collect_filters(combined_filters)
+    df, error, _ = db.get_table_data(
+        table_name,
+        filters=filters,
+        columns=selected_columns or None,
+        limit=PAGE_SIZE,
+        offset=page * PAGE_SIZE,
+        build_display=False,
+    )
+    if error:
+        return dbc.Alert(error, color="danger"), dash.no_update, dash.no_update, dash.no_update
+    if df.empty and page > 0:
+        raise PreventUpdate
+    table = create_results_grid(df)
+    info = html.Div(f"{len(df)} rows returned")
+    return table, info, {"page": page, "source": "table"}, f"page {page + 1}"
+
+
+@app.callback(
+    Output("table-results", "children", allow_duplicate=True),
+    Output("query-info", "children", allow_duplicate=True),
+    Output("sql-display", "children", allow_duplicate=True),
+    Output("current-data-store", "data", allow_duplicate=True),
+    Output("schema-store", "data", allow_duplicate=True),
+    Output("page-state", "data", allow_duplicate=True),
+    Output("page-indicator", "children", allow_duplicate=True),
+    Input("run-query-btn", "n_clicks"),
+    State("db-path-input", "value"),
+    State("custom-query-input", "value"),
+    State("column-checklist", "value"),
+    prevent_initial_call=True,
+)
+def execute_custom_query(n_clicks, db_path, query, selected_columns):
+    if not db_path or not query:
+        raise PreventUpdate
+    db, error = get_database(db_path)
+    if error:
+        alert = dbc.Alert(f"Could not open database: {error}", color="danger")
+        return alert, None, None, None, None, dash.no_update, dash.no_update
+    df, error = db.execute_query(query, limit=500)
+    if error:
+        return (
+            dbc.Alert(error, color="danger"),
+            None, None, None, None,
+            dash.no_update, dash.no_update,
+        )
+    display_df = get_selected_columns_for_display(df, selected_columns)
+    # The store keeps the full-column frame so widening the column
+    # selection doesn't require re-running the user's SQL.
+    payload = store_payload(
+        df, {"db": db_path, "query": query}, source="query"
+    )
+    # Paging is table-backed only; mark the source so the page buttons
+    # can't clobber a custom-query view with table pages.
+    return (*finalize_query_result(display_df, query, payload),
+            {"page": 0, "source": "query"}, "")
+
+
+@app.callback(
+    Output("column-selector", "children"),
+    Input("table-columns-store", "data"),
+)
+def update_column_selector(columns):
+    """Render the column checklist once per table load.
+
+    One dcc.Checklist replaces the per-column dbc.Checkbox components:
+    a toggle updates a single value list instead of making Dash walk N
+    pattern-matched components, and the select/clear-all buttons
+    rewrite that list clientside (assets/cols.js).
+    """
+    if not columns:
+        raise PreventUpdate
+    return dcc.Checklist(
+        id="column-checklist",
+        options=[{"label": c, "value": c} for c in columns],
+        value=list(columns),
+        inline=True,
+        labelClassName="me-3",
+        inputClassName="me-1",
+    )
+
+
+app.clientside_callback(
+    ClientsideFunction(namespace="cols", function_name="setAll"),
+    Output("column-checklist", "value"),
+    Input("select-all-cols-btn", "n_clicks"),
+    Input("clear-all-cols-btn", "n_clicks"),
+    State("column-checklist", "options"),
+    prevent_initial_call=True,
+)
+
+
+@app.callback(
+    Output("table-results", "children", allow_duplicate=True),
+    Input("column-checklist", "value"),
+    State("current-data-store", "data"),
+    prevent_initial_call=True,
+)
+def apply_column_selection_to_display(selected_columns, data):
+    df = resolve_frame(data)
+    if df is None:
+        raise PreventUpdate
+    display_df = get_selected_columns_for_display(df, selected_columns)
+    return create_results_grid(display_df)
+
+
+# UI-only transforms run clientside (assets/ui.js): no Flask
+# round-trip, no JSON re-render of server-built children.
+app.clientside_callback(
+    ClientsideFunction(namespace="ui", function_name="updateDebugCell"),
+    Output("debug-active-cell", "children"),
+    Input("data-table", "active_cell"),
+    prevent_initial_call=True,
+)
+
+app.clientside_callback(
+    ClientsideFunction(namespace="ui", function_name="toggleExportDisabled"),
+    Output("export-table-btn", "disabled"),
+    Input("export-path-input", "value"),
+)
+
+
+@app.callback(
+    Output("statistics-container", "children"),
+    Input("current-data-store", "data"),
+    State("db-path-input", "value"),
+    State("current-table-store", "data"),
+    State("current-filters-store", "data"),
+)
+def update_statistics(data, db_path, table_name, filters):
+    fp = store_fp(data)
+
+    def compute():
+        # Table-backed results: one SQL scan computes every numeric
+        # column's aggregates without rehydrating the frame. Custom
+        # queries fall back to the cached frame — the table/filters
+        # states can be stale leftovers from before the query ran, so
+        # the payload's source decides, not their presence.
+        if store_source(data) == "table" and db_path and table_name:
+            db, error = get_database(db_path)
+            if not error:
+                summaries, error = db.get_numeric_summaries(table_name, filters)
+                if not error:
+                    return _render_statistics(summaries)
+        df = resolve_frame(data)
+        if df is None:
+            return html.Div("No data loaded", className="text-muted")
+        return _build_statistics(df)
+
+    if not data:
+        return html.Div("No data loaded", className="text-muted")
+    if fp:
+        stats_fp = server_side_cache.fingerprint({"node": "statistics"}, fp)
+        return server_side_cache.get_or_compute(stats_fp, compute)
+    return compute()
+
+
+def _numeric_summaries_arrow(df):
+    """Per-column (name, count, mean, std, min, max) via Arrow kernels.
+
+    pyarrow.compute runs single-pass vectorized C++ kernels per column
+    instead of pandas' per-column Python dispatch; returns None when no
+    column has a numeric Arrow type so the caller can fall back to the
+    coercing pandas path.
+    """
+    tbl = pa.Table.from_pandas(df, preserve_index=False)
+    summaries = []
+    for name in tbl.schema.names:
+        if not pa.types.is_integer(
+            tbl.schema.field(name).type
+        ) and not pa.types.is_floating(tbl.schema.field(name).type):
+            continue
+        col = tbl[name]
+        count = len(col) - col.null_count
+        if count == 0:
+            continue
+        summaries.append(
+            (
+                name,
+                count,
+                pc.mean(col).as_py(),
+                pc.stddev(col, ddof=1).as_py(),
+                pc.min(col).as_py(),
+                pc.max(col).as_py(),
+            )
+        )
+    return summaries or None
+
+
+def _numeric_summaries_pandas(df):
+    numeric_df = df.apply(pd.to_numeric, errors="coerce")
+    summaries = []
+    for col in numeric_df.columns:
+        series = numeric_df[col]
+        if not series.notna().any():
+            continue
+        summaries.append(
+            (
+                col,
+                int(series.count()),
+                series.mean(),
+                series.std(),
+                series.min(),
+                series.max(),
+            )
+        )
+    return summaries
+
+
+def _build_statistics(df):
+    summaries = _numeric_summaries_arrow(df) if HAVE_PYARROW else None
+    if summaries is None:
+        summaries = _numeric_summaries_pandas(df)
+    return _render_statistics(summaries)
+
+
+def _render_statistics(summaries):
+    if not summaries:
+        return html.Div("No numeric columns", className="text-muted")
+    rows = [
+        html.Tr(
+            [
+                html.Td(name),
+                html.Td(count),
+                html.Td(f"{mean:.4g}"),
+                html.Td("" if std is None else f"{std:.4g}"),
+                html.Td(f"{mn:.4g}"),
+                html.Td(f"{mx:.4g}"),
+            ]
+        )
+        for name, count, mean, std, mn, mx in summaries
+    ]
+    header = html.Thead(
+        html.Tr([html.Th(h) for h in ["column", "count", "mean", "std", "min", "max"]])
+    )
+    return dbc.Table([header, html.Tbody(rows)], bordered=True, size="sm")
+
+
+def _viz_spec_sql(db, table_name, column, filters, viz_type):
+    """Build a viz spec with the aggregation pushed into SQLite.
+
+    Returns None when SQL can't produce the spec (errors, empty
+    numeric range) so the caller can fall back to the frame path.
+    """
+    if viz_type == "bar":
+        rows, error = db.get_value_counts(table_name, column, filters, limit=20)
+        if error or not rows:
+            return None
+        return {"x": [str(v) for v, _ in rows], "y": [c for _, c in rows]}
+    if viz_type == "histogram":
+        bins, error = db.get_histogram_bins(table_name, column, filters, bins=30)
+        if error or bins is None:
+            return None
+        return {
+            "x": bins["centers"],
+            "y": bins["counts"],
+            "width": bins["width"] * 0.95,
+        }
+    return None
+
+
+@app.callback(
+    Output("viz-figure-json", "data"),
+    Input("viz-column-selector", "value"),
+    Input("viz-type-selector", "value"),
+    State("current-data-store", "data"),
+    State("db-path-input", "value"),
+    State("current-table-store", "data"),
+    State("current-filters-store", "data"),
+)
+def update_visualization(column, viz_type, data, db_path, table_name, filters):
+    if not column:
+        raise PreventUpdate
+
+    fp = store_fp(data)
+
+    def build():
+        # Every branch aggregates server-side: the figure JSON carries
+        # bins, counts, or quantiles — never the raw column — so the
+        # payload stays O(bins) regardless of row count. Table-backed
+        # results aggregate inside SQLite (GROUP BY / bucketed counts)
+        # without rehydrating the result frame at all; custom-query
+        # results and box plots use the cached frame.
+        if (
+            store_source(data) == "table"
+            and db_path
+            and table_name
+            and viz_type in ("bar", "histogram")
+        ):
+            db, error = get_database(db_path)
+            if not error:
+                spec = _viz_spec_sql(db, table_name, column, filters, viz_type)
+                if spec is not None:
+                    return _figure_from_spec(spec, column, viz_type)
+        if fp:
+            return make_viz_builder(column, viz_type, fp)()
+        frame = resolve_frame(data)
+        if frame is None or column not in frame.columns:
+            return _EMPTY_FIGURE
+        return _figure_from_spec(
+            _viz_spec(frame[column], viz_type), column, viz_type
+        )
+
+    key = (
+        column,
+        viz_type,
+        fp or _data_fingerprint(store_records(data) or [table_name, filters]),
+    )
+    return _cached_figure_json(key, build)
+
+
+app.clientside_callback(
+    ClientsideFunction(namespace="ui", function_name="parseFigure"),
+    Output("data-visualization", "figure"),
+    Input("viz-figure-json", "data"),
+)
+
+
+@app.callback(
+    Output("viz-column-selector", VIZ_OPTIONS_PROP),
+    Input("schema-store", "data"),
+)
+def update_viz_options(schema):
+    if not schema:
+        raise PreventUpdate
+    return [{"label": c, "value": c} for c in schema]
+
+
+# Exports run off the callback thread so the worker returns
+# immediately; an interval callback surfaces completion. Export work is
+# I/O-bound (sqlite3 and file writes release the GIL).
+_EXPORT_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+# Sidecar writes get their own tiny pool: submitting them back onto
+# the export pool could deadlock once all its workers are exports
+# blocked on their sidecar futures.
+_SIDECAR_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+_EXPORT_JOBS = {}
+# Fingerprints of exports currently running, so a double-click (or two
+# users asking for the identical artifact) attaches to the in-flight
+# job instead of racing it on the DB and the destination file.
+_EXPORT_INFLIGHT = set()
+_EXPORT_INFLIGHT_LOCK = threading.Lock()
+
+
+def _run_export(
+    db_path_expanded,
+    table_name,
+    filters,
+    columns,
+    compress,
+    export_format,
+    durable,
+    tsv_path,
+    query_path,
+    export_fp,
+):
+    """Worker body for one export job; returns (text, color, store)."""
+    db, error = get_database(db_path_expanded)
+    if error:
+        return f"Could not open database: {error}", "danger", None
+    # The display SQL is known before any row is read, so the sidecar
+    # write proceeds concurrently with the TSV stream; on slow
+    # filesystems its open/write/close latency disappears behind the
+    # row I/O.
+    export_sql_query, error = db.build_export_sql(table_name, filters, columns)
+    if error:
+        return f"Export failed: {error}", "danger", None
+    sidecar = _SIDECAR_EXECUTOR.submit(query_path.write_text, export_sql_query)
+    if export_format == "parquet":
+        rows_written, col_count, _, error = db.export_table_to_parquet(
+            table_name, tsv_path, filters=filters, columns=columns,
+            durable=durable,
+        )
+    else:
+        rows_written, col_count, _, error = db.export_table_to_tsv(
+            table_name,
+            tsv_path,
+            filters=filters,
+            columns=columns,
+            compress=compress,
+            durable=durable,
+        )
+    if error:
+        return f"Export failed: {error}", "danger", None
+    try:
+        sidecar.result()
+    except OSError as e:
+        # The data file is already published; don't tell the user the
+        # export failed over a missing sidecar.
+        return (
+            f"Exported {rows_written} rows × {col_count} columns to {tsv_path} "
+            f"(warning: could not write SQL sidecar: {e})",
+            "warning",
+            {"fp": export_fp, "path": str(tsv_path)},
+        )
+    return (
+        f"Exported {rows_written} rows × {col_count} columns to {tsv_path}",
+        "success",
+        {"fp": export_fp, "path": str(tsv_path)},
+    )
+
+
+@app.callback(
+    Output("export-status", "children"),
+    Output("last-export-store", "data"),
+    Output("export-poll-interval", "disabled"),
+    Input("export-table-btn", "n_clicks"),
+    State("db-path-input", "value"),
+    State("current-table-store", "data"),
+    State("current-filters-store", "data"),
+    State("export-path-input", "value"),
+    State("export-selected-columns-only", "value"),
+    State("export-compress", "value"),
+    State("export-format", "value"),
+    State("export-durable", "value"),
+    State("column-checklist", "value"),
+    State("last-export-store", "data"),
+    prevent_initial_call=True,
+)
+def export_filtered_table(
+    n_clicks,
+    db_path,
+    table_name,
+    filters,
+    export_path,
+    export_selected_only,
+    export_compress,
+    export_format,
+    export_durable,
+    selected_columns,
+    last_export,
+):
+    if not db_path or not table_name:
+        return (
+            dbc.Alert("Load a table first", color="warning"),
+            dash.no_update,
+            dash.no_update,
+        )
+    if not export_path:
+        return (
+            dbc.Alert("Enter an export directory", color="warning"),
+            dash.no_update,
+            dash.no_update,
+        )
+
+    # Identical filters/columns/destination as the previous export and
+    # the file still exists: nothing to re-serialize.
+    export_fp = server_side_cache.fingerprint(
+        {
+            "db": db_path,
+            "table": table_name,
+            "filters": filters,
+            "selected_only": bool(export_selected_only),
+            "compress": bool(export_compress),
+            "format": export_format or "tsv",
+            "durable": bool(export_durable),
+            "columns": selected_columns or [],
+            "export_path": export_path,
+        }
+    )
+    with _EXPORT_INFLIGHT_LOCK:
+        inflight = export_fp in _EXPORT_INFLIGHT
+    if inflight:
+        return (
+            dbc.Alert("An identical export is already running", color="info"),
+            dash.no_update,
+            False,
+        )
+    if (
+        last_export
+        and last_export.get("fp") == export_fp
+        and Path(last_export.get("path", "")).exists()
+    ):
+        return (
+            dbc.Alert(
+                f"Unchanged since last export; reusing {last_export['path']}",
+                color="info",
+            ),
+            dash.no_update,
+            dash.no_update,
+        )
+    db_path_expanded = expand_path(db_path)
+    export_dir = expand_path(export_path)
+    # One mkdir attempt is the whole check: exist_ok=True makes the
+    # happy path a single syscall, and the exception type distinguishes
+    # "exists but is a file" from permission problems — no separate
+    # is_dir() probe needed.
+    try:
+        export_dir.mkdir(parents=True, exist_ok=True)
+    except (FileExistsError, NotADirectoryError):
+        return (
+            dbc.Alert(f"Not a directory: {export_dir}", color="danger"),
+            dash.no_update,
+            dash.no_update,
+        )
+    except OSError as e:
+        return (
+            dbc.Alert(f"Could not create export directory: {e}", color="danger"),
+            dash.no_update,
+            dash.no_update,
+        )
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if export_format == "parquet":
+        suffix = ".parquet"
+    elif export_compress:
+        suffix = ".tsv.gz"
+    else:
+        suffix = ".tsv"
+    tsv_path = export_dir / f"{table_name}_{timestamp}{suffix}"
+    query_path = export_dir / f"{table_name}_{timestamp}.sql"
+    # Stream straight from the cursor: the full result set is never
+    # materialized as a DataFrame, and column projection happens in the
+    # SELECT itself.
+    columns = selected_columns if export_selected_only else None
+    job_id = uuid.uuid4().hex[:8]
+    with _EXPORT_INFLIGHT_LOCK:
+        if export_fp in _EXPORT_INFLIGHT:
+            return (
+                dbc.Alert("An identical export is already running", color="info"),
+                dash.no_update,
+                False,
+            )
+        _EXPORT_INFLIGHT.add(export_fp)
+
+    def job():
+        try:
+            return _run_export(
+                db_path_expanded,
+                table_name,
+                filters,
+                columns or None,
+                bool(export_compress),
+                export_format or "tsv",
+                bool(export_durable),
+                tsv_path,
+                query_path,
+                export_fp,
+            )
+        finally:
+            with _EXPORT_INFLIGHT_LOCK:
+                _EXPORT_INFLIGHT.discard(export_fp)
+
+    _EXPORT_JOBS[job_id] = _EXPORT_EXECUTOR.submit(job)
+    return (
+        dbc.Alert(f"Export started (job {job_id})", color="info"),
+        dash.no_update,
+        False,
+    )
+
+
+@app.callback(
+    Output("export-status", "children", allow_duplicate=True),
+    Output("last-export-store", "data", allow_duplicate=True),
+    Output("export-poll-interval", "disabled", allow_duplicate=True),
+    Input("export-poll-interval", "n_intervals"),
+    prevent_initial_call=True,
+)
+def poll_export_jobs(n_intervals):
+    # Snapshot: the export callback inserts into the dict from other
+    # worker threads while this iterates.
+    finished = [(jid, f) for jid, f in list(_EXPORT_JOBS.items()) if f.done()]
+    message = dash.no_update
+    store = dash.no_update
+    for job_id, future in finished:
+        _EXPORT_JOBS.pop(job_id, None)
+        try:
+            text, color, store_data = future.result()
+        except Exception as e:  # surface worker crashes, don't re-raise
+            text, color, store_data = f"Export failed: {e}", "danger", None
+        message = dbc.Alert(text, color=color)
+        if store_data:
+            store = store_data
+    return message, store, not _EXPORT_JOBS
+
+
+if __name__ == "__main__":
+    app.run(debug=True)
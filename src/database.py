@@ -0,0 +1,1103 @@
+import csv
+import gzip
+import os
+from collections import OrderedDict
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    # Optional: the ADBC SQLite driver materializes results straight
+    # into Arrow columnar buffers, skipping per-row Python tuples.
+    import adbc_driver_sqlite.dbapi as adbc
+except ImportError:
+    adbc = None
+
+
+@lru_cache(maxsize=128)
+def expand_path(path):
+    """Cached user-path expansion; the UI re-sends the same strings."""
+    return Path(str(path)).expanduser()
+
+
+def _numeric(value):
+    return float(value) if value else 0.0
+
+
+def _in_clause(field, value):
+    values = [v.strip() for v in str(value).split(",") if v.strip()]
+    if not values:
+        # An empty IN () is a SQLite syntax error; match nothing instead.
+        return "0", []
+    placeholders = ", ".join("?" for _ in values)
+    return f'"{field}" IN ({placeholders})', values
+
+
+# Selectivity heuristic for predicate ordering: exact matches first,
+# then ranges, then LIKE scans. SQLite's planner benefits from stats,
+# but ordering sharp predicates first helps even without them.
+OP_SELECTIVITY = {
+    "is_null": 0,
+    "is_not_null": 0,
+    "equals": 0,
+    "in": 0,
+    "not_equals": 1,
+    "less_than": 1,
+    "less_than_or_equal": 1,
+    "greater_than": 1,
+    "greater_than_or_equal": 1,
+    "like": 2,
+    "not_like": 2,
+}
+
+# Operator -> (condition fragment, params) builders, resolved with a
+# single dict lookup instead of an if/elif ladder on every filter.
+OP_HANDLERS = {
+    "equals": lambda f, v: (f'"{f}" = ?', [v]),
+    "not_equals": lambda f, v: (f'"{f}" != ?', [v]),
+    "like": lambda f, v: (f'"{f}" LIKE ?', [f"%{v}%"]),
+    "not_like": lambda f, v: (f'"{f}" NOT LIKE ?', [f"%{v}%"]),
+    "less_than": lambda f, v: (f'"{f}" < ?', [_numeric(v)]),
+    "less_than_or_equal": lambda f, v: (f'"{f}" <= ?', [_numeric(v)]),
+    "greater_than": lambda f, v: (f'"{f}" > ?', [_numeric(v)]),
+    "greater_than_or_equal": lambda f, v: (f'"{f}" >= ?', [_numeric(v)]),
+    "in": _in_clause,
+    "is_null": lambda f, v: (f'"{f}" IS NULL', []),
+    "is_not_null": lambda f, v: (f'"{f}" IS NOT NULL', []),
+}
+
+
+# Vectorized pandas equivalents for the simple predicates, used by the
+# in-memory fast path when a table is already fully cached. LIKE is
+# deliberately absent — those fall back to SQL. Every comparison is
+# ANDed with notna() to match SQL semantics: NULL compares to nothing,
+# so `!= ?` excludes NULL rows and `= ?` can never match them (the
+# bare astype(str) turned NaN into the matchable string "nan").
+_MASK_BUILDERS = {
+    "equals": lambda col, v: col.notna() & (col.astype(str) == str(v)),
+    "not_equals": lambda col, v: col.notna() & (col.astype(str) != str(v)),
+    "in": lambda col, v: col.notna()
+    & col.astype(str).isin([x.strip() for x in str(v).split(",") if x.strip()]),
+    "less_than": lambda col, v: pd.to_numeric(col, errors="coerce") < _numeric(v),
+    "less_than_or_equal": lambda col, v: pd.to_numeric(col, errors="coerce")
+    <= _numeric(v),
+    "greater_than": lambda col, v: pd.to_numeric(col, errors="coerce") > _numeric(v),
+    "greater_than_or_equal": lambda col, v: pd.to_numeric(col, errors="coerce")
+    >= _numeric(v),
+    "is_null": lambda col, v: col.isna(),
+    "is_not_null": lambda col, v: col.notna(),
+}
+
+
+# Pragmas applied to every pooled connection. WAL allows concurrent
+# readers across the Dash worker threads; the cache/mmap settings keep
+# repeated scans of the same pages off the pread path.
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    # 1 GiB mmap window: repeated scans of the same columns (filter
+    # dropdowns, then the filter itself, then export) become pointer
+    # walks in mapped memory instead of pread() calls.
+    "PRAGMA mmap_size=1073741824",
+    "PRAGMA cache_size=-262144",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+class DatabaseConnection:
+    """Connection wrapper for the SQLite databases browsed by the app.
+
+    Holds a small pool of connections so parallel Dash callbacks don't
+    serialize on (or crash against) a single thread-bound handle.
+    """
+
+    def __init__(self, db_path, pool_size=None, read_only=True, immutable=False):
+        self.db_path = str(expand_path(db_path))
+        self.pool_size = pool_size or os.cpu_count() or 1
+        # The app is a browser: open read-only by default so SQLite
+        # skips journal/WAL sidecar writes and write-compatible locking.
+        # immutable=1 additionally skips all locking, for databases
+        # guaranteed not to change during the session.
+        self.read_only = read_only
+        self.immutable = immutable
+        self._pool = None
+        self.table_names = []
+        self._table_set = set()
+        self._quoted_table = {}
+        self.current_columns = []
+        # Full column schema per table, loaded in one round-trip at
+        # connect time; schemas don't change between user actions.
+        self._schema = {}
+        self._column_sets = {}
+        # Most recent unfiltered load per table: (df, covered_table).
+        self._table_cache = {}
+        # Distinct values per (table, column) for the filter dropdowns.
+        self._distinct_cache = {}
+        # get_table_info results keyed by (table, db mtime): any write
+        # to the file bumps the mtime and naturally invalidates.
+        self._info_cache = {}
+        # (table, column) pairs already offered an auto-index.
+        self._auto_indexed = set()
+        # Lazily-opened ADBC connection for columnar result fetches.
+        self._adbc_conn = None
+        self._adbc_lock = threading.Lock()
+        # Rendered display SQL per (query, params).
+        self._display_sql_cache = {}
+        # Recent result frames keyed by the full query shape + values.
+        self._result_cache = OrderedDict()
+
+    def _open_connection(self):
+        # cached_statements is sqlite3's internal prepared-statement
+        # cache, keyed on statement text; with connections now pooled it
+        # replaces any cursor-level caching, which cannot roam between
+        # pool members. 256 entries cover the per-(table, column)
+        # metadata/DISTINCT statements the filter UI generates.
+        if self.read_only:
+            # cache=shared lets the read pool share one page cache
+            # instead of warming pool_size private copies.
+            uri = f"file:{self.db_path}?mode=ro&cache=shared"
+            if self.immutable:
+                uri += "&immutable=1"
+            conn = sqlite3.connect(
+                uri,
+                uri=True,
+                cached_statements=256,
+                check_same_thread=False,
+                isolation_level=None,
+            )
+            # Belt and braces on top of mode=ro: refuse writes at the
+            # statement level too.
+            try:
+                conn.execute("PRAGMA query_only=1")
+            except sqlite3.Error:
+                pass
+        else:
+            conn = sqlite3.connect(
+                self.db_path,
+                cached_statements=256,
+                check_same_thread=False,
+                isolation_level=None,
+            )
+        # Plain-tuple rows: sqlite3.Row adds per-row mapping overhead
+        # that pandas immediately throws away when building frames.
+        for pragma in _CONNECTION_PRAGMAS:
+            try:
+                conn.execute(pragma)
+            except sqlite3.Error:
+                pass
+        return conn
+
+    def connect(self):
+        """Open the connection pool. Returns (ok, error)."""
+        opened = []
+        try:
+            pool = queue.Queue(maxsize=self.pool_size)
+            for _ in range(self.pool_size):
+                conn = self._open_connection()
+                opened.append(conn)
+                pool.put(conn)
+            self._pool = pool
+            self._load_table_names()
+            # ANALYZE writes sqlite_stat1, which the read-only pool
+            # (mode=ro + query_only) can never do, so it goes through a
+            # short-lived writable connection like the auto-index path;
+            # best effort, skipped silently on read-only files.
+            try:
+                stats_conn = sqlite3.connect(self.db_path)
+                stats_conn.execute("ANALYZE")
+                stats_conn.commit()
+                stats_conn.close()
+            except sqlite3.Error:
+                pass
+            return True, None
+        except sqlite3.Error as e:
+            for conn in opened:
+                conn.close()
+            self._pool = None
+            return False, str(e)
+
+    @contextmanager
+    def _borrow(self):
+        """Check a connection out of the pool for the enclosed block."""
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self):
+        if self._pool is not None:
+            while not self._pool.empty():
+                self._pool.get_nowait().close()
+            self._pool = None
+        self._schema.clear()
+        self._table_cache.clear()
+        self._distinct_cache.clear()
+        self._info_cache.clear()
+        self._auto_indexed.clear()
+        self._display_sql_cache.clear()
+        self._result_cache.clear()
+        if self._adbc_conn is not None:
+            self._adbc_conn.close()
+            self._adbc_conn = None
+
+    def execute(self, sql, params=()):
+        """Run a statement on a pooled connection; fetch all rows."""
+        with self._borrow() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def _load_table_names(self):
+        rows = self.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )
+        self.table_names = [row[0] for row in rows]
+        # Pre-quoted identifiers plus a set for O(1) membership checks,
+        # so per-call SQL assembly never re-validates or re-quotes.
+        self._table_set = set(self.table_names)
+        self._quoted_table = {name: f'"{name}"' for name in self.table_names}
+        self._load_schema()
+
+    def _load_schema(self):
+        """Load every table's columns in a single round-trip.
+
+        Uses the pragma_table_info table-valued function (SQLite >=
+        3.16) joined against sqlite_master, so table switches don't pay
+        one PRAGMA per table. Falls back to lazy per-table PRAGMAs on
+        older SQLite builds.
+        """
+        self._schema = {}
+        try:
+            rows = self.execute(
+                "SELECT m.name, p.name, p.type, p.\"notnull\", p.pk "
+                "FROM sqlite_master m JOIN pragma_table_info(m.name) p "
+                "WHERE m.type='table' AND m.name NOT LIKE 'sqlite_%' "
+                "ORDER BY m.name, p.cid"
+            )
+        except sqlite3.Error:
+            return
+        for table, col, col_type, notnull, pk in rows:
+            self._schema.setdefault(table, []).append(
+                {"name": col, "type": col_type, "notnull": notnull, "pk": pk}
+            )
+        self._column_sets = {
+            table: {c["name"] for c in cols} for table, cols in self._schema.items()
+        }
+
+    def _validate_ident(self, name, kind="table", table=None):
+        """Raise ValueError unless `name` is a known table or column.
+
+        Every identifier that reaches SQL assembly goes through the
+        whitelist, so the interpolated SQL text is always built from a
+        closed set of strings — injection-safe and maximally reusable
+        by the statement cache.
+        """
+        if kind == "table":
+            if name not in self._table_set:
+                raise ValueError(f"Unknown table: {name}")
+        else:
+            columns = self._column_sets.get(table)
+            if columns is None:
+                columns = {c["name"] for c in self._table_schema(table)}
+                self._column_sets[table] = columns
+            if name not in columns:
+                raise ValueError(f"Unknown column: {name}")
+
+    def _table_schema(self, table_name):
+        """Column dicts for a table, from the preloaded schema."""
+        cached = self._schema.get(table_name)
+        if cached is not None:
+            return cached
+        rows = self.execute(
+            f'PRAGMA table_info({self._quoted_table[table_name]})'
+        )
+        columns = [
+            {"name": row[1], "type": row[2], "notnull": row[3], "pk": row[5]}
+            for row in rows
+        ]
+        self._schema[table_name] = columns
+        return columns
+
+    def get_table_info(self, table_name):
+        """Return ({'columns': [...], 'row_count': n}, error) for a table."""
+        if table_name not in self._table_set:
+            return None, f"Unknown table: {table_name}"
+        try:
+            mtime = os.path.getmtime(self.db_path)
+        except OSError:
+            mtime = None
+        key = (table_name, mtime)
+        cached = self._info_cache.get(key)
+        if cached is not None:
+            return cached, None
+        try:
+            columns = self._table_schema(table_name)
+            row_count, approximate = self._estimate_row_count(table_name)
+            info = {
+                "columns": columns,
+                "row_count": row_count,
+                "approximate": approximate,
+            }
+            if mtime is not None:
+                self._info_cache[key] = info
+            return info, None
+        except sqlite3.Error as e:
+            return None, str(e)
+
+    def _estimate_row_count(self, table_name):
+        """Return (row_count, approximate) without a full table scan.
+
+        MAX(_rowid_) is a single btree descent that SQLite optimizes
+        specially; it over-counts only if rows were deleted, which is
+        fine for a browse UI. WITHOUT ROWID tables fall back to the
+        ANALYZE stats, and only as a last resort to a COUNT(*) scan.
+        """
+        try:
+            rows = self.execute(
+                f'SELECT MAX(_rowid_) FROM {self._quoted_table[table_name]}'
+            )
+            max_rowid = rows[0][0]
+            if max_rowid is not None:
+                return max_rowid, True
+        except sqlite3.Error:
+            pass
+        try:
+            rows = self.execute(
+                "SELECT stat FROM sqlite_stat1 WHERE tbl = ?", (table_name,)
+            )
+            if rows:
+                return int(rows[0][0].split()[0]), True
+        except (sqlite3.Error, ValueError, IndexError):
+            pass
+        rows = self.execute(
+            f'SELECT COUNT(*) FROM {self._quoted_table[table_name]}'
+        )
+        return rows[0][0], False
+
+    def get_columns(self, table_name):
+        """Return ([column names], error) for a table — a dict lookup."""
+        if table_name not in self._table_set:
+            return [], f"Unknown table: {table_name}"
+        try:
+            columns = [c["name"] for c in self._table_schema(table_name)]
+            self.current_columns = columns
+            return columns, None
+        except sqlite3.Error as e:
+            return [], str(e)
+
+    def get_distinct_values(self, table_name, column, limit=1000):
+        """Distinct non-null values of a column, cached per column.
+
+        Dropdown population cost is O(distinct values) instead of
+        O(rows), and repeat visits to the same column are served from
+        the cache. Returns (values, error).
+        """
+        try:
+            self._validate_ident(table_name)
+            self._validate_ident(column, kind="column", table=table_name)
+        except ValueError as e:
+            return [], str(e)
+        key = (table_name, column, limit)
+        cached = self._distinct_cache.get(key)
+        if cached is not None:
+            return cached, None
+        try:
+            rows = self.execute(
+                f'SELECT DISTINCT "{column}" '
+                f'FROM {self._quoted_table[table_name]} '
+                f'WHERE "{column}" IS NOT NULL ORDER BY 1 LIMIT ?',
+                (limit,),
+            )
+        except sqlite3.Error as e:
+            return [], str(e)
+        values = [row[0] for row in rows]
+        self._distinct_cache[key] = values
+        return values, None
+
+    def get_value_counts(self, table_name, column, filters=None, limit=20):
+        """Top value counts for a column, aggregated inside SQLite.
+
+        Returns ([(value, count), ...], error). The GROUP BY runs where
+        the rows live, so only `limit` pairs cross into Python instead
+        of the raw column.
+        """
+        try:
+            self._validate_ident(table_name)
+            self._validate_ident(column, kind="column", table=table_name)
+            where_clause, params = self.build_where_clause(
+                filters or [], table_name=table_name
+            )
+        except ValueError as e:
+            return [], str(e)
+        sql = (
+            f'SELECT "{column}", COUNT(*) '
+            f'FROM {self._quoted_table[table_name]}'
+        )
+        if where_clause:
+            sql += f" WHERE {where_clause}"
+        sql += f' GROUP BY "{column}" ORDER BY 2 DESC LIMIT ?'
+        try:
+            rows = self.execute(sql, (*params, limit))
+        except sqlite3.Error as e:
+            return [], str(e)
+        return [(row[0], row[1]) for row in rows], None
+
+    def get_histogram_bins(self, table_name, column, filters=None, bins=30):
+        """Equal-width histogram computed inside SQLite.
+
+        Returns ({'centers': [...], 'counts': [...], 'width': w}, error)
+        or (None, error) when the column has no numeric values. Two
+        small queries (min/max, then a bucketed GROUP BY) replace
+        shipping the raw column to Python for numpy to bin.
+        """
+        try:
+            self._validate_ident(table_name)
+            self._validate_ident(column, kind="column", table=table_name)
+            where_clause, params = self.build_where_clause(
+                filters or [], table_name=table_name
+            )
+        except ValueError as e:
+            return None, str(e)
+        quoted_col = f'"{column}"'
+        where_sql = f" AND {where_clause}" if where_clause else ""
+        base = (
+            f'FROM {self._quoted_table[table_name]} '
+            f"WHERE {quoted_col} IS NOT NULL{where_sql}"
+        )
+        try:
+            rows = self.execute(
+                f"SELECT MIN({quoted_col}), MAX({quoted_col}) {base}", params
+            )
+            lo, hi = rows[0] if rows else (None, None)
+            if lo is None or hi is None:
+                return None, None
+            lo, hi = float(lo), float(hi)
+            width = (hi - lo) / bins or 1.0
+            # Clamp to [0, bins-1] in SQL: columns without numeric
+            # affinity can mix text with numbers, making MIN/MAX (and
+            # hence the bucket expression) stray outside the bin range.
+            bucket = (
+                f"MAX(MIN(CAST(({quoted_col} - ?) / ? AS INTEGER), ?), 0)"
+            )
+            rows = self.execute(
+                f"SELECT {bucket} AS bucket, COUNT(*) {base} "
+                f"GROUP BY bucket ORDER BY bucket",
+                (lo, width, bins - 1, *params),
+            )
+            counts = [0] * bins
+            for bucket_idx, count in rows:
+                # Second line of defense alongside the SQL clamp —
+                # never let a stray bucket index escape the callback or
+                # alias the last bin via negative indexing.
+                bucket_idx = int(bucket_idx)
+                if 0 <= bucket_idx < bins:
+                    counts[bucket_idx] += count
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            return None, str(e)
+        centers = [lo + width * (i + 0.5) for i in range(bins)]
+        return {"centers": centers, "counts": counts, "width": width}, None
+
+    _NUMERIC_AFFINITIES = ("INT", "REAL", "FLOA", "DOUB", "NUM", "DEC")
+
+    def get_numeric_summaries(self, table_name, filters=None):
+        """count/mean/std/min/max for every numeric column in one query.
+
+        One SELECT computes COUNT/AVG/AVG(x*x)/MIN/MAX per numeric
+        column (by declared affinity); sample stddev is derived from
+        the two averages. A single scan replaces five per-column passes
+        in Python. Returns ([(name, count, mean, std, min, max)], error).
+        """
+        try:
+            self._validate_ident(table_name)
+            where_clause, params = self.build_where_clause(
+                filters or [], table_name=table_name
+            )
+        except ValueError as e:
+            return [], str(e)
+        numeric_cols = [
+            c["name"]
+            for c in self._table_schema(table_name)
+            if str(c["type"]).upper().startswith(self._NUMERIC_AFFINITIES)
+        ]
+        if not numeric_cols:
+            return [], None
+        exprs = []
+        for c in numeric_cols:
+            q = f'"{c}"'
+            exprs.append(
+                f"COUNT({q}), AVG({q}), AVG({q} * {q}), MIN({q}), MAX({q})"
+            )
+        sql = f'SELECT {", ".join(exprs)} FROM {self._quoted_table[table_name]}'
+        if where_clause:
+            sql += f" WHERE {where_clause}"
+        try:
+            row = self.execute(sql, params)[0]
+        except sqlite3.Error as e:
+            return [], str(e)
+        summaries = []
+        for i, name in enumerate(numeric_cols):
+            count, mean, mean_sq, mn, mx = row[i * 5:i * 5 + 5]
+            if not count:
+                continue
+            std = None
+            if count > 1 and mean is not None and mean_sq is not None:
+                variance = max(mean_sq - mean * mean, 0.0) * count / (count - 1)
+                std = variance ** 0.5
+            summaries.append((name, count, mean, std, mn, mx))
+        return summaries, None
+
+    def build_where_clause(self, filters, table_name=None):
+        """Build (where_clause, params) from a list of filter dicts.
+
+        Each filter is {'field': ..., 'operator': ..., 'value': ...}.
+        Values are always bound as parameters so that the statement text
+        depends only on the filter shape (field, operator) — the cached
+        statement is reused across filter-value changes. When
+        `table_name` is given every field is whitelist-checked against
+        that table's schema before being interpolated.
+        """
+        conditions = []
+        params = []
+        # Stable sort: most selective predicates first so short-circuit
+        # evaluation and index choice see them before the LIKE scans.
+        filters = sorted(
+            filters, key=lambda f: OP_SELECTIVITY.get(f.get("operator"), 1)
+        )
+        for f in filters:
+            field = f.get("field")
+            operator = f.get("operator")
+            if not field or not operator:
+                continue
+            handler = OP_HANDLERS.get(operator)
+            if handler is None:
+                continue
+            if table_name is not None:
+                self._validate_ident(field, kind="column", table=table_name)
+            condition, condition_params = handler(field, f.get("value", ""))
+            conditions.append(condition)
+            params.extend(condition_params)
+        where_clause = " AND ".join(conditions)
+        return where_clause, params
+
+    def format_sql_for_display(self, query, params):
+        """Substitute bound parameters into a query for display only.
+
+        Single pass: split on the placeholders once and interleave the
+        formatted values (the old per-parameter str.replace rescanned
+        the whole query for each value and corrupted the output when a
+        substituted value itself contained a '?'). Results are
+        memoized per (query, params) — repeat applies of the same
+        filter shape and values render for free.
+        """
+        if not params:
+            return query
+        try:
+            key = (query, tuple(params))
+        except TypeError:
+            key = None
+        if key is not None:
+            cached = self._display_sql_cache.get(key)
+            if cached is not None:
+                return cached
+        parts = query.split("?")
+        out = [parts[0]]
+        for param, tail in zip(params, parts[1:]):
+            if isinstance(param, str):
+                out.append("'" + param.replace("'", "''") + "'")
+            else:
+                out.append(str(param))
+            out.append(tail)
+        # More placeholders than params: keep the remainder verbatim,
+        # placeholders included.
+        if len(parts) > len(params) + 1:
+            out.append("?".join(parts[len(params) + 1:]))
+            out.insert(len(out) - 1, "?")
+        rendered = "".join(out)
+        if key is not None:
+            if len(self._display_sql_cache) > 256:
+                self._display_sql_cache.clear()
+            self._display_sql_cache[key] = rendered
+        return rendered
+
+    def _ensure_filter_indexes(self, table_name, filters):
+        """Opportunistically index equality-filtered columns.
+
+        First use of a column in an equals/IN filter issues CREATE
+        INDEX IF NOT EXISTS through a short-lived writable connection,
+        turning later filter applies from table scans into btree
+        lookups. Best effort: read-only or locked databases silently
+        skip, and each (table, column) is attempted once.
+        """
+        for f in filters or []:
+            if f.get("operator") not in ("equals", "in"):
+                continue
+            field = f.get("field")
+            key = (table_name, field)
+            if not field or key in self._auto_indexed:
+                continue
+            self._auto_indexed.add(key)
+            try:
+                self._validate_ident(field, kind="column", table=table_name)
+            except ValueError:
+                continue
+            try:
+                conn = sqlite3.connect(self.db_path)
+                conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS '
+                    f'"idx_auto_{table_name}_{field}" '
+                    f'ON {self._quoted_table[table_name]}("{field}")'
+                )
+                conn.commit()
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def get_table_data(
+        self,
+        table_name,
+        filters=None,
+        limit=500,
+        columns=None,
+        build_display=True,
+        offset=0,
+    ):
+        """Fetch rows from a table. Returns (df, error, display_sql).
+
+        display_sql is only formatted when build_display is true; a
+        caller that is not going to show the SQL panel should pass
+        False and skip that string work entirely.
+
+        The statement text is a pure function of (table_name, columns,
+        filter shape, limit), so repeated applies with different filter
+        values hit the same cached statement and only rebind parameters.
+        When `columns` is given, projection happens in SQL so the bytes
+        moved out of SQLite scale with the selected columns, not the
+        table width.
+        """
+        if table_name not in self._table_set:
+            return None, f"Unknown table: {table_name}", None
+        try:
+            query, params = self._build_select(
+                table_name, filters, columns, limit, offset
+            )
+            display_query = (
+                self.format_sql_for_display(query, params) if build_display else None
+            )
+
+            cache_key = (query, tuple(str(p) for p in params))
+            cached_result = self._result_cache.get(cache_key)
+            if cached_result is not None:
+                # Tab flips and repeat applies of the same view are
+                # zero-I/O; copies guard the cache against caller-side
+                # mutation. A concurrent eviction between the get and
+                # the recency bump is harmless — just skip the bump.
+                try:
+                    self._result_cache.move_to_end(cache_key)
+                except KeyError:
+                    pass
+                return cached_result.copy(), None, display_query
+
+            if not offset:
+                cached = self._mask_filter_cached(
+                    table_name, filters, limit, columns
+                )
+                if cached is not None:
+                    return cached, None, display_query
+
+            if limit is not None:
+                df = self._fetch_df(query, params)
+            else:
+                # No LIMIT to bound the result, so stream it in chunks
+                # rather than materializing everything in one allocation.
+                df = self._read_chunked(query, params=params)
+
+            if not filters and columns is None and not offset:
+                # Remember the unfiltered load (and whether it covered
+                # the whole table) for the vectorized refinement path.
+                # Offset pages must never land here: a short final page
+                # would masquerade as a complete table.
+                complete = limit is None or len(df) < int(limit)
+                # Cache a private copy: callers may mutate the frame
+                # they get back.
+                self._table_cache[table_name] = (df.copy(), complete)
+            if limit is not None:
+                self._result_cache[cache_key] = df.copy()
+                while len(self._result_cache) > 32:
+                    self._result_cache.popitem(last=False)
+            return df, None, display_query
+        except ValueError as e:
+            return None, str(e), None
+        except (sqlite3.Error, pd.errors.DatabaseError) as e:
+            return None, str(e), None
+
+    def _mask_filter_cached(self, table_name, filters, limit, columns):
+        """Vectorized refinement of an already-cached full table load.
+
+        Interactive filter tweaking re-queries the same table over and
+        over; when the unfiltered load covered the whole table and every
+        predicate has a pandas equivalent, boolean masks over the cached
+        frame replace the SQL round-trip. Returns None on any miss.
+        """
+        if not filters:
+            return None
+        entry = self._table_cache.get(table_name)
+        if entry is None:
+            return None
+        df, complete = entry
+        if not complete:
+            return None
+        mask = pd.Series(True, index=df.index)
+        for f in filters:
+            field = f.get("field")
+            builder = _MASK_BUILDERS.get(f.get("operator"))
+            if builder is None or field not in df.columns:
+                return None
+            mask &= builder(df[field], f.get("value", ""))
+        result = df[mask]
+        if limit is not None:
+            result = result.head(int(limit))
+        if columns:
+            result = result[[c for c in columns if c in result.columns]]
+        return result.reset_index(drop=True)
+
+    def _build_select(
+        self, table_name, filters=None, columns=None, limit=None, offset=0
+    ):
+        """Assemble the SELECT text + params shared by read and export."""
+        if columns:
+            known, _ = self.get_columns(table_name)
+            bad = [c for c in columns if c not in known]
+            if bad:
+                raise ValueError(f"Unknown columns: {', '.join(bad)}")
+            select_cols = ", ".join(f'"{c}"' for c in columns)
+        else:
+            select_cols = "*"
+        query = f'SELECT {select_cols} FROM {self._quoted_table[table_name]}'
+        params = []
+        if filters:
+            self._ensure_filter_indexes(table_name, filters)
+            where_clause, params = self.build_where_clause(
+                filters, table_name=table_name
+            )
+            if where_clause:
+                query += f" WHERE {where_clause}"
+        if limit is not None:
+            # Bound, not inlined: every page and every limit variation
+            # shares one statement text in the statement cache.
+            query += " LIMIT ?"
+            params.append(int(limit))
+            if offset:
+                query += " OFFSET ?"
+                params.append(int(offset))
+        return query, params
+
+    def build_export_sql(self, table_name, filters=None, columns=None):
+        """Display SQL for an export, without executing anything."""
+        if table_name not in self._table_set:
+            return None, f"Unknown table: {table_name}"
+        try:
+            query, params = self._build_select(table_name, filters, columns)
+        except ValueError as e:
+            return None, str(e)
+        return self.format_sql_for_display(query, params), None
+
+    @contextmanager
+    def stream_table_data(
+        self, table_name, filters=None, columns=None, batch_size=10_000
+    ):
+        """Stream matching rows without materializing a DataFrame.
+
+        Context manager yielding (headers, batch_iterator): the cursor
+        lives on a borrowed pool connection for the duration of the
+        block and hands out tuple batches of `batch_size` rows, so any
+        consumer (TSV writer, compressors, Parquet sinks) runs in
+        O(batch) memory.
+        """
+        query, params = self._build_select(table_name, filters, columns)
+        with self._borrow() as conn:
+            cursor = conn.execute(query, params)
+            cursor.arraysize = batch_size
+            headers = [d[0] for d in cursor.description]
+
+            def batches():
+                while True:
+                    batch = cursor.fetchmany()
+                    if not batch:
+                        return
+                    yield batch
+
+            yield headers, batches()
+
+    @staticmethod
+    def _replace_into_place(tmp_path, out_path, durable=False):
+        """Publish a staged export atomically; fsync only when asked.
+
+        Exports are regenerable artifacts, so the default skips fsync —
+        on spinning or network disks that saves tens to hundreds of ms
+        per export. durable=True fsyncs the staged file before the
+        rename and the directory entry after it, so the published name
+        survives a crash.
+        """
+        if durable:
+            fd = os.open(tmp_path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        os.replace(tmp_path, out_path)
+        if durable:
+            dir_fd = os.open(os.path.dirname(os.path.abspath(out_path)) or ".",
+                             os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+    def export_table_to_tsv(
+        self,
+        table_name,
+        out_path,
+        filters=None,
+        columns=None,
+        compress=False,
+        durable=False,
+    ):
+        """Stream matching rows from SQLite straight into a TSV file.
+
+        No DataFrame is materialized: csv.writer.writerows pulls tuple
+        batches lazily from the streaming cursor, so memory stays
+        O(batch) regardless of how many rows match. With compress=True
+        the stream runs through gzip at compresslevel=1 — compression
+        overlaps row formatting batch by batch rather than squeezing
+        one giant buffer afterwards, and level 1 keeps the CPU cost
+        negligible next to the I/O saved. Returns (rows_written,
+        column_count, display_sql, error).
+        """
+        if table_name not in self._table_set:
+            return 0, 0, None, f"Unknown table: {table_name}"
+        try:
+            query, params = self._build_select(table_name, filters, columns)
+        except ValueError as e:
+            return 0, 0, None, str(e)
+        display_query = self.format_sql_for_display(query, params)
+        rows_written = 0
+        column_count = 0
+        # Stage next to the destination and os.replace into place: the
+        # same-filesystem rename is a metadata operation, so consumers
+        # never observe a half-written export and aborted runs leave no
+        # partial file under the final name.
+        tmp_path = f"{out_path}.tmp"
+        try:
+            with self.stream_table_data(
+                table_name, filters=filters, columns=columns
+            ) as (headers, batches):
+                column_count = len(headers)
+                # 1 MiB user-space buffer: one write() per ~1 MiB of
+                # rows instead of one per csv chunk.
+                if compress:
+                    f = gzip.open(tmp_path, "wt", compresslevel=1, newline="")
+                else:
+                    f = open(tmp_path, "w", newline="", buffering=1 << 20)
+                with f:
+                    writer = csv.writer(f, delimiter="\t")
+                    writer.writerow(headers)
+                    # Bind the bound method once: the loop body is just
+                    # one C call per batch.
+                    writerows = writer.writerows
+                    for batch in batches:
+                        writerows(batch)
+                        rows_written += len(batch)
+            self._replace_into_place(tmp_path, out_path, durable=durable)
+        except (sqlite3.Error, OSError, ValueError) as e:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return rows_written, column_count, display_query, str(e)
+        return rows_written, column_count, display_query, None
+
+    def export_table_to_parquet(
+        self, table_name, out_path, filters=None, columns=None, durable=False
+    ):
+        """Stream matching rows into a zstd-compressed Parquet file.
+
+        Record batches flow straight from the cursor into a
+        ParquetWriter, so memory stays O(batch) like the TSV path while
+        producing a columnar file that is far smaller and faster to
+        re-read for analytical consumers. Requires pyarrow. Returns
+        (rows_written, column_count, display_sql, error).
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            return 0, 0, None, "Parquet export requires pyarrow"
+        if table_name not in self._table_set:
+            return 0, 0, None, f"Unknown table: {table_name}"
+        try:
+            query, params = self._build_select(table_name, filters, columns)
+        except ValueError as e:
+            return 0, 0, None, str(e)
+        display_query = self.format_sql_for_display(query, params)
+        rows_written = 0
+        column_count = 0
+        tmp_path = f"{out_path}.tmp"
+        writer = None
+        try:
+            with self.stream_table_data(
+                table_name, filters=filters, columns=columns
+            ) as (headers, batches):
+                column_count = len(headers)
+                for batch in batches:
+                    arrays = [pa.array(list(col)) for col in zip(*batch)]
+                    record_batch = pa.RecordBatch.from_arrays(
+                        arrays, names=headers
+                    )
+                    if writer is None:
+                        writer = pq.ParquetWriter(
+                            tmp_path, record_batch.schema, compression="zstd"
+                        )
+                    writer.write_batch(record_batch)
+                    rows_written += len(batch)
+                if writer is None:
+                    # No rows matched: emit an empty all-string table.
+                    empty = pa.table(
+                        {name: pa.array([], type=pa.string()) for name in headers}
+                    )
+                    pq.write_table(empty, tmp_path, compression="zstd")
+            if writer is not None:
+                writer.close()
+                writer = None
+            self._replace_into_place(tmp_path, out_path, durable=durable)
+        except (sqlite3.Error, OSError, ValueError, pa.ArrowInvalid) as e:
+            if writer is not None:
+                writer.close()
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return rows_written, column_count, display_query, str(e)
+        return rows_written, column_count, display_query, None
+
+    def _fetch_df(self, query, params):
+        """Materialize a bounded query result as a DataFrame.
+
+        Prefers the ADBC driver when installed — it decodes into Arrow
+        buffers in C, typically 2-10x faster than tuple-by-tuple cursor
+        fetches on wide results — and falls back to the pooled sqlite3
+        cursor plus DataFrame.from_records.
+        """
+        if adbc is not None:
+            try:
+                with self._adbc_lock:
+                    if self._adbc_conn is None:
+                        self._adbc_conn = adbc.connect(self.db_path)
+                    cursor = self._adbc_conn.cursor()
+                    try:
+                        cursor.execute(query, params or None)
+                        table = cursor.fetch_arrow_table()
+                    finally:
+                        cursor.close()
+                return table.to_pandas()
+            except adbc.Error:
+                pass
+        with self._borrow() as conn:
+            cursor = conn.execute(query, params)
+            fetched = cursor.fetchall()
+            return pd.DataFrame.from_records(
+                fetched, columns=[d[0] for d in cursor.description]
+            )
+
+    def _read_chunked(
+        self, query, params=None, limit=None, chunksize=10_000, timeout=None
+    ):
+        """Read a query chunk-wise, stopping once `limit` rows are in.
+
+        With `timeout` set, a progress handler interrupts the statement
+        after that many seconds — SQLite raises 'interrupted', which
+        callers surface as a normal error string — so a runaway cross
+        join cannot pin a worker indefinitely.
+        """
+        chunks = []
+        rows = 0
+        with self._borrow() as conn:
+            if timeout is not None:
+                deadline = time.monotonic() + timeout
+                conn.set_progress_handler(
+                    lambda: 1 if time.monotonic() > deadline else 0, 100_000
+                )
+            try:
+                for chunk in pd.read_sql_query(
+                    query, conn, params=params, chunksize=chunksize
+                ):
+                    chunks.append(chunk)
+                    rows += len(chunk)
+                    if limit is not None and rows >= limit:
+                        break
+            finally:
+                if timeout is not None:
+                    conn.set_progress_handler(None, 0)
+        if not chunks:
+            return pd.DataFrame()
+        df = pd.concat(chunks, ignore_index=True)
+        if limit is not None:
+            df = df.head(limit)
+        return df
+
+    def execute_query(self, query, limit=None, timeout=5.0):
+        """Run a user-supplied read query. Returns (df, error).
+
+        Ad-hoc queries frequently forget a LIMIT; streaming in chunks
+        keeps peak memory bounded to the collected rows and lets an
+        optional `limit` stop the read early instead of materializing
+        the full result first. The default timeout interrupts bad
+        queries (cross joins, unindexed scans) after a few seconds
+        rather than blocking a worker.
+        """
+        try:
+            return self._read_chunked(query, limit=limit, timeout=timeout), None
+        except (sqlite3.Error, pd.errors.DatabaseError) as e:
+            return None, str(e)
+
+
+# Process-wide DatabaseConnection per database path. Dash callbacks
+# used to build a fresh connection (file open, WAL/shm setup, schema
+# load, page cache from cold) on every click; sharing one pooled
+# instance keeps all of that warm across callbacks and users.
+_DATABASES = {}
+_DATABASES_LOCK = threading.Lock()
+
+
+def get_database(db_path):
+    """Shared DatabaseConnection for a path. Returns (db, error)."""
+    key = str(expand_path(db_path))
+    with _DATABASES_LOCK:
+        db = _DATABASES.get(key)
+        if db is not None:
+            return db, None
+        db = DatabaseConnection(key)
+        ok, error = db.connect()
+        if not ok:
+            return None, error
+        _DATABASES[key] = db
+        return db, None
+
+
+def invalidate_database(db_path=None):
+    """Drop (and close) one cached database, or all of them."""
+    with _DATABASES_LOCK:
+        if db_path is None:
+            for db in _DATABASES.values():
+                db.close()
+            _DATABASES.clear()
+            return
+        key = str(expand_path(db_path))
+        db = _DATABASES.pop(key, None)
+        if db is not None:
+            db.close()
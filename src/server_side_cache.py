@@ -0,0 +1,60 @@
+"""Fingerprint-keyed cache for derived query results.
+
+Each node in the filter -> aggregate -> viz pipeline is identified by a
+fingerprint of its defining spec chained to its parent's fingerprint,
+so identical pipelines resolve to identical keys: switching tabs or
+re-rendering a view whose inputs did not change becomes a cache hit
+instead of a recompute over the rows.
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+
+
+def fingerprint(node_spec, parent_fp=""):
+    """Stable hash of a node's spec chained to its parent fingerprint."""
+    payload = json.dumps(node_spec, sort_keys=True, default=str) + parent_fp
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+class LRUCache:
+    """Small insertion-ordered LRU for frames and derived results."""
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is not None:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                # Evicted by another thread between get and bump; the
+                # value we already hold is still good.
+                pass
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+
+# Shared node-result cache. Keys are fingerprints; values are whatever
+# the node produced (DataFrame, component tree, figure JSON, ...).
+results = LRUCache(maxsize=64)
+
+
+def get_or_compute(fp, compute):
+    """Return the cached result for fp, computing and storing on miss."""
+    value = results.get(fp)
+    if value is None:
+        value = compute()
+        results.put(fp, value)
+    return value